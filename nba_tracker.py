@@ -4,7 +4,9 @@ Tracks wins and stats for 7 friends who drafted 4 NBA teams each
 """
 
 import requests
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import date, datetime, timedelta
 import pandas as pd
 from typing import Dict, List
 from nba_api.stats.endpoints import leaguedashteamstats
@@ -12,9 +14,208 @@ from nba_api.stats.static import teams
 from nba_api.stats.endpoints import leaguegamelog
 from nba_api.stats.endpoints import scoreboardv2
 from nba_api.stats.endpoints import ScheduleLeagueV2
+from nba_api.library.http import NBAHTTP
 import time
+import threading
 import csv
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import tempfile
+import orjson
 from io import StringIO
+import bisect
+import sys
+from collections import Counter
+
+# Shared HTTP session so repeated calls reuse pooled keep-alive connections.
+# Retries/backoff for transient failures (e.g. ESPN throttling) are handled by
+# urllib3, honoring any Retry-After header the server sends; nba_api hosts are
+# the exception, see _nba_api_call.
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Referer': 'https://www.nba.com/',
+    'Origin': 'https://www.nba.com',
+    'x-nba-stats-origin': 'stats',
+    'x-nba-stats-token': 'true',
+})
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    # update_data.py runs the schedule and history catch-up pools (8 threads
+    # each) alongside the standings/today/yesterday fetches, all against
+    # site.api.espn.com; size the pool so none of those connections are discarded
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=4,
+        backoff_factor=1.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=True,
+    ),
+))
+# nba_api requests are retried by _nba_api_call (which also resets stuck
+# connections), so their hosts get no urllib3 retries stacked under that
+_NBA_API_ADAPTER = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=0)
+for _nba_api_host in ('https://stats.nba.com', 'https://cdn.nba.com'):
+    _SESSION.mount(_nba_api_host, _NBA_API_ADAPTER)
+# nba_api endpoints (stats and live) otherwise keep a session of their own;
+# share ours so they reuse the same pooled connections
+NBAHTTP.set_session(_SESSION)
+
+# stats.nba.com throttles bursts, so nba_api calls are spaced at least this far apart
+NBA_API_MIN_INTERVAL = 0.6  # seconds
+_nba_api_lock = threading.Lock()
+_nba_api_last_call = 0.0
+
+
+def _throttle_nba_api(min_interval=NBA_API_MIN_INTERVAL):
+    """
+    Block until at least min_interval seconds have passed since the previous
+    nba_api call from any thread. Only waits when calls actually come close together.
+    """
+    global _nba_api_last_call
+    with _nba_api_lock:
+        wait = _nba_api_last_call + min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _nba_api_last_call = time.monotonic()
+
+
+def _nba_api_call(endpoint, *args, max_retries=3, retry_delay=2, min_interval=NBA_API_MIN_INTERVAL, **kwargs):
+    """
+    Construct (and so request) an nba_api endpoint, throttled and retried.
+    Network errors and garbled responses are retried with exponential backoff.
+    stats.nba.com can leave pooled connections stuck after a timeout, so the
+    shared session's connections are dropped before each retry.
+    """
+    for attempt in range(max_retries):
+        _throttle_nba_api(min_interval)
+        try:
+            return endpoint(*args, **kwargs)
+        except (requests.RequestException, ValueError) as e:
+            if attempt == max_retries - 1:
+                raise
+            delay = retry_delay * 2 ** attempt
+            print(f"{endpoint.__name__} attempt {attempt + 1} failed: {e}. Retrying in {delay} seconds...")
+            _SESSION.close()
+            time.sleep(delay)
+
+# On-disk cache for JSON API responses, keyed by URL + params
+HTTP_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'nba_tracker')
+STANDINGS_CACHE_TTL = 10 * 60  # seconds
+SCHEDULE_CACHE_TTL = 24 * 60 * 60  # seconds; the season schedule rarely changes
+
+
+def _cache_path(url, params=None):
+    """Path of the cache file for a given request"""
+    key = url + '?' + '&'.join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+    return os.path.join(HTTP_CACHE_DIR, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+
+def _cache_get(path, ttl):
+    """
+    Return the cached entry at path, or None if missing or older than ttl seconds.
+    Pass ttl=None to accept an entry of any age.
+    """
+    try:
+        with open(path, 'rb') as f:
+            entry = orjson.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if ttl is not None and time.time() - entry.get('ts', 0) > ttl:
+        return None
+    return entry
+
+
+def _cache_set(path, entry):
+    """Write a response entry (body + validators) to the cache, ignoring filesystem errors"""
+    try:
+        os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps({**entry, 'ts': time.time()}))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write HTTP cache: {e}")
+
+
+def write_json_atomic(path, data):
+    """
+    Write data to path as compact JSON via a temp file + rename, so readers
+    never see a partially written file. Each write gets its own temp file, so
+    concurrent writers (a web refresh and update_data.py) can't clobber each other.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        # mkstemp creates the file owner-only; keep the cache world-readable as before
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _fetch_json(url, params=None, cached=None, timeout=(5, 15)):
+    """
+    GET a JSON endpoint through the shared session and return an entry dict
+    with the decoded body and the response's ETag/Last-Modified validators.
+    If a previous entry is passed, the request is made conditional and a
+    304 Not Modified returns that entry without downloading or decoding the body.
+    """
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    
+    response = _SESSION.get(url, params=params, headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached:
+        return cached
+    response.raise_for_status()
+    return {
+        'body': orjson.loads(response.content),
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+
+
+def _get_json(url, params=None, ttl=0, timeout=(5, 15), max_stale=None):
+    """
+    GET a JSON endpoint through the shared session.
+    Responses are cached on disk for ttl seconds (ttl=0 disables the cache);
+    expired entries are revalidated with a conditional request.
+    If the request fails, the last cached response is returned if it was fetched
+    within max_stale seconds (None accepts any age, 0 never falls back).
+    """
+    path = _cache_path(url, params) if ttl else None
+    stale = None
+    if path:
+        entry = _cache_get(path, ttl)
+        if entry is not None:
+            return entry['body']
+        stale = _cache_get(path, None)
+    
+    try:
+        entry = _fetch_json(url, params=params, cached=stale, timeout=timeout)
+    except Exception as e:
+        if stale is None or (max_stale is not None and time.time() - stale.get('ts', 0) > max_stale):
+            raise
+        print(f"Request to {url} failed ({e}), using cached response")
+        return stale['body']
+    
+    if path:
+        _cache_set(path, entry)
+    return entry['body']
 
 # NBA API uses different team names in different endpoints
 # Scoreboard/GameLog APIs use "Los Angeles Clippers"
@@ -29,33 +230,19 @@ def normalize_team_name(team_name):
     """Normalize team names to match TEAM_ASSIGNMENTS format"""
     return API_TEAM_NAME_NORMALIZATION.get(team_name, team_name)
 
-# Mapping of our team names to NBA API team names
-TEAM_NAME_MAP = {
-    "Thunder": "Thunder",
-    "Spurs": "Spurs",
-    "Pistons": "Pistons",
-    "Pelicans": "Pelicans",
-    "Magic": "Magic",
-    "Hawks": "Hawks",
-    "Grizzlies": "Grizzlies",
-    "Suns": "Suns",
-    "Warriors": "Warriors",
-    "Pacers": "Pacers",
-    "Mavericks": "Mavericks",
-    "Hornets": "Hornets",
-    "Nuggets": "Nuggets",
-    "Celtics": "Celtics",
-    "Heat": "Heat",
-    "Kings": "Kings",
-    "Knicks": "Knicks",
-    "Clippers": "Clippers",
-    "Raptors": "Raptors",
-    "Bulls": "Bulls",
-    "Rockets": "Rockets",
-    "Timberwolves": "Timberwolves",
-    "76ers": "76ers",
-    "Trail Blazers": "Trail Blazers"
-}
+
+def normalize_team_names(names):
+    """Vectorized normalize_team_name for a pandas Series of team names"""
+    return names.map(API_TEAM_NAME_NORMALIZATION).fillna(names)
+
+
+def index_team_data(team_data):
+    """
+    Build a lookup from TEAM_ASSIGNMENTS-style team names to the keys of team_data,
+    so callers can resolve each drafted team with a single dict lookup
+    """
+    return {normalize_team_name(name): name for name in team_data}
+
 
 # Team draft assignments - 2024-25 NBA Season
 # Using full team names to match NBA API
@@ -71,58 +258,34 @@ TEAM_ASSIGNMENTS = {
 }
 
 
-def fetch_nba_standings():
+def _build_team_to_friend(assignments):
+    """Invert a friend -> teams mapping into team -> friend"""
+    return {team: friend for friend, teams_list in assignments.items() for team in teams_list}
+
+
+# Reverse lookup of TEAM_ASSIGNMENTS, built once at import.
+# Use set_team_assignments() to change assignments so the two stay in sync.
+# Only these trusted names are interned; sandbox assignments may hold non-strings.
+TEAM_TO_FRIEND = {sys.intern(team): friend for team, friend in _build_team_to_friend(TEAM_ASSIGNMENTS).items()}
+
+
+def set_team_assignments(assignments):
     """
-    Fetch current NBA standings and team statistics
-    Returns a dictionary with team data including wins, losses, points for/against
+    Replace the team assignments in place (e.g. for sandbox mode) and
+    rebuild TEAM_TO_FRIEND to match
     """
-    try:
-        # Using NBA Stats API endpoint for team standings
-        url = "https://stats.nba.com/stats/leaguestandingsv3"
-        params = {
-            "LeagueID": "00",
-            "Season": "2025-26",
-            "SeasonType": "Regular Season"
-        }
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-            'Accept': 'application/json',
-            'Referer': 'https://www.nba.com/',
-            'Origin': 'https://www.nba.com'
-        }
-        
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Parse the response
-        standings = {}
-        result_sets = data.get('resultSets', [])
-        
-        if result_sets:
-            headers_list = result_sets[0].get('headers', [])
-            rows = result_sets[0].get('rowSet', [])
-            
-            for row in rows:
-                team_data = dict(zip(headers_list, row))
-                team_name = team_data.get('TeamName', '')
-                
-                standings[team_name] = {
-                    'team': team_name,
-                    'city': team_data.get('TeamCity', ''),
-                    'wins': team_data.get('WINS', 0),
-                    'losses': team_data.get('LOSSES', 0),
-                    'win_pct': team_data.get('WinPCT', 0.0),
-                    'conf_rank': team_data.get('Conference', 0),
-                    'games_back': team_data.get('ConferenceGamesBack', 0)
-                }
-        
-        return standings
-        
-    except Exception as e:
-        print(f"Error fetching NBA standings: {e}")
-        return None
+    TEAM_ASSIGNMENTS.clear()
+    TEAM_ASSIGNMENTS.update(assignments)
+    TEAM_TO_FRIEND.clear()
+    TEAM_TO_FRIEND.update(_build_team_to_friend(TEAM_ASSIGNMENTS))
+
+
+# nba_api team ID -> full team name; nba_api ships this list statically
+TEAM_ID_TO_NAME = {team['id']: team['full_name'] for team in teams.get_teams()}
+
+
+# Standings stats read from each ESPN entry; everything else in the entry is ignored
+_ESPN_STAT_KEYS = ['wins', 'losses', 'pointsFor', 'pointsAgainst', 'winPercent']
 
 
 def fetch_team_stats_espn():
@@ -133,31 +296,33 @@ def fetch_team_stats_espn():
     try:
         print("Fetching from ESPN API...")
         url = "https://site.api.espn.com/apis/v2/sports/basketball/nba/standings"
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        data = response.json()
+        # No stale fallback: if ESPN is down, fetch_team_stats should fall back to
+        # the NBA API rather than save old standings under a fresh timestamp
+        data = _get_json(url, ttl=STANDINGS_CACHE_TTL, max_stale=0)
         
-        team_stats = {}
-        for conf in data.get('children', []):
-            for entry in conf.get('standings', {}).get('entries', []):
-                team_name = entry.get('team', {}).get('displayName', '')
-                stats_map = {s['name']: s for s in entry.get('stats', [])}
-                
-                wins = int(float(stats_map.get('wins', {}).get('value', 0)))
-                losses = int(float(stats_map.get('losses', {}).get('value', 0)))
-                pts_for = float(stats_map.get('pointsFor', {}).get('value', 0))
-                pts_against = float(stats_map.get('pointsAgainst', {}).get('value', 0))
-                win_pct = float(stats_map.get('winPercent', {}).get('value', 0))
-                
-                team_stats[team_name] = {
-                    'games_played': wins + losses,
-                    'wins': wins,
-                    'losses': losses,
-                    'win_pct': win_pct,
-                    'total_pts_scored': pts_for,
-                    'total_plus_minus': pts_for - pts_against,
-                    'total_pts_allowed': pts_against
-                }
+        # One row per team, then one row per (team, stat) pivoted into columns
+        entries = pd.json_normalize(data.get('children', []), record_path=['standings', 'entries'])
+        team_names = entries['team.displayName'].tolist()
+        stat_rows = entries[['team.displayName', 'stats']].explode('stats').dropna(subset=['stats'])
+        stat_rows = (pd.json_normalize(stat_rows['stats'].tolist())
+                     .reindex(columns=['name', 'value'])
+                     .assign(team=stat_rows['team.displayName'].to_numpy()))
+        stat_rows = stat_rows[stat_rows['name'].isin(_ESPN_STAT_KEYS)].drop_duplicates(['team', 'name'])
+        stats = (stat_rows.pivot(index='team', columns='name', values='value')
+                 .reindex(index=team_names, columns=_ESPN_STAT_KEYS)
+                 .astype(float).fillna(0))
+        
+        wins = stats['wins'].astype(int)
+        losses = stats['losses'].astype(int)
+        team_stats = pd.DataFrame({
+            'games_played': wins + losses,
+            'wins': wins,
+            'losses': losses,
+            'win_pct': stats['winPercent'],
+            'total_pts_scored': stats['pointsFor'],
+            'total_plus_minus': stats['pointsFor'] - stats['pointsAgainst'],
+            'total_pts_allowed': stats['pointsAgainst'],
+        }).to_dict('index')
         
         if len(team_stats) == 30:
             print(f"✅ ESPN API: Got data for {len(team_stats)} teams")
@@ -174,49 +339,53 @@ def fetch_team_stats_nba():
     """
     Backup: Fetch team statistics from stats.nba.com via nba_api library.
     """
-    max_retries = 2
-    retry_delay = 10
-    
-    for attempt in range(max_retries):
-        try:
-            time.sleep(1)  # Rate limiting
-            
-            stats = leaguedashteamstats.LeagueDashTeamStats(
-                season='2025-26',
-                season_type_all_star='Regular Season',
-                per_mode_detailed='Totals',
-                date_from_nullable='10/21/2025',
-                date_to_nullable='04/12/2026',
-                timeout=30
-            )
-            
-            df = stats.get_data_frames()[0]
-            
-            team_stats = {}
-            for _, row in df.iterrows():
-                team_name = row['TEAM_NAME']
-                total_pts = float(row['PTS'])
-                total_plus_minus = float(row.get('PLUS_MINUS', 0.0))
-                team_stats[team_name] = {
-                    'games_played': int(row['GP']),
-                    'wins': int(row['W']),
-                    'losses': int(row['L']),
-                    'win_pct': float(row['W_PCT']),
-                    'total_pts_scored': total_pts,
-                    'total_plus_minus': total_plus_minus,
-                    'total_pts_allowed': total_pts - total_plus_minus
-                }
-            
-            print(f"✅ NBA API: Got data for {len(team_stats)} teams")
-            return team_stats
-            
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"NBA API attempt {attempt + 1} failed: {e}. Retrying in {retry_delay}s...")
-                time.sleep(retry_delay)
-            else:
-                print(f"NBA API failed after {max_retries} attempts: {e}")
-                return None
+    try:
+        stats = _nba_api_call(
+            leaguedashteamstats.LeagueDashTeamStats,
+            min_interval=1,  # Rate limiting
+            season='2025-26',
+            season_type_all_star='Regular Season',
+            per_mode_detailed='Totals',
+            date_from_nullable='10/21/2025',
+            date_to_nullable='04/12/2026',
+            timeout=30
+        )
+        
+        # Only 7 of the ~30 returned columns are used; drop the rest up front
+        df = stats.get_data_frames()[0].reindex(
+            columns=['TEAM_NAME', 'GP', 'W', 'L', 'W_PCT', 'PTS', 'PLUS_MINUS'])
+        
+        # Convert the whole frame at once rather than row by row;
+        # PLUS_MINUS may be missing or null, so default it to 0
+        df['PLUS_MINUS'] = df['PLUS_MINUS'].fillna(0.0)
+        df = df.rename(columns={
+            'GP': 'games_played',
+            'W': 'wins',
+            'L': 'losses',
+            'W_PCT': 'win_pct',
+            'PTS': 'total_pts_scored',
+            'PLUS_MINUS': 'total_plus_minus',
+        }).astype({
+            'games_played': int,
+            'wins': int,
+            'losses': int,
+            'win_pct': float,
+            'total_pts_scored': float,
+            'total_plus_minus': float,
+        })
+        df['total_pts_allowed'] = df['total_pts_scored'] - df['total_plus_minus']
+        
+        team_stats = df.set_index('TEAM_NAME')[[
+            'games_played', 'wins', 'losses', 'win_pct',
+            'total_pts_scored', 'total_plus_minus', 'total_pts_allowed',
+        ]].to_dict('index')
+        
+        print(f"✅ NBA API: Got data for {len(team_stats)} teams")
+        return team_stats
+        
+    except Exception as e:
+        print(f"NBA API failed: {e}")
+        return None
 
 
 def fetch_team_stats():
@@ -233,71 +402,75 @@ def fetch_team_stats():
     return fetch_team_stats_nba()
 
 
-def fetch_historical_standings():
+def fetch_historical_standings(team_records=None, dates=None):
     """
-    Fetch game-by-game results to build historical standings over time
+    Fetch game-by-game results to build historical standings over time.
+    Pass previously fetched team_records and dates to only download games from
+    the last cached date onward and extend that history instead of rebuilding it.
     """
-    max_retries = 3
-    retry_delay = 5
+    # The last cached date is fetched again, in case it was cached before all of its games finished
+    since = dates[-1] if team_records and dates else None
     
-    for attempt in range(max_retries):
-        try:
-            time.sleep(0.6)
-            
-            # Get all games for the season (regular season: Oct 21, 2025 - Apr 12, 2026)
-            gamelog = leaguegamelog.LeagueGameLog(
-                season='2025-26',
-                season_type_all_star='Regular Season',
-                date_from_nullable='10/21/2025',
-                date_to_nullable='04/12/2026',
-                timeout=60
-            )
-            
-            df = gamelog.get_data_frames()[0]
-            
-            # Sort by game date
-            df = df.sort_values('GAME_DATE')
-            
-            # Build cumulative records for each team by date
-            team_records = {}
-            dates = []
-            
-            for _, game in df.iterrows():
-                game_date = game['GAME_DATE']
-                team_name = game['TEAM_NAME']
-                wl = game['WL']  # 'W' or 'L'
-                
-                if team_name not in team_records:
-                    team_records[team_name] = {'wins': 0, 'losses': 0, 'history': []}
-                
-                # Update record
-                if wl == 'W':
-                    team_records[team_name]['wins'] += 1
-                else:
-                    team_records[team_name]['losses'] += 1
-                
-                total_games = team_records[team_name]['wins'] + team_records[team_name]['losses']
-                win_pct = team_records[team_name]['wins'] / total_games if total_games > 0 else 0
-                
-                team_records[team_name]['history'].append({
-                    'date': game_date,
-                    'wins': team_records[team_name]['wins'],
-                    'losses': team_records[team_name]['losses'],
-                    'win_pct': win_pct
-                })
-                
-                if game_date not in dates:
-                    dates.append(game_date)
-            
-            return team_records, sorted(set(dates))
-            
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"Attempt {attempt + 1} failed: {e}. Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                print(f"Error fetching historical standings after {max_retries} attempts: {e}")
-                return None, None
+    try:
+        # Get all games for the season (regular season: Oct 21, 2025 - Apr 12, 2026)
+        gamelog = _nba_api_call(
+            leaguegamelog.LeagueGameLog,
+            season='2025-26',
+            season_type_all_star='Regular Season',
+            date_from_nullable=datetime.strptime(since, '%Y-%m-%d').strftime('%m/%d/%Y') if since else '10/21/2025',
+            date_to_nullable='04/12/2026',
+            timeout=60
+        )
+        
+        df = gamelog.get_data_frames()[0]
+        
+        # Sort by game date
+        df = df[['GAME_DATE', 'TEAM_NAME', 'WL']].sort_values('GAME_DATE', kind='stable')
+        
+        # Keep the cached history before the refetched range; new games count on from it.
+        # A team's cached entry for `since` is only replaced if the new log has a result
+        # for it that day, so an empty or partly published log can't drop that day.
+        records_by_team = {}
+        kept_since = False
+        if since:
+            refetched = set(df.loc[df['GAME_DATE'] == since, 'TEAM_NAME'])
+            for team_name, record in team_records.items():
+                records_by_team[team_name] = [
+                    h for h in record['history']
+                    if h['date'] < since or (h['date'] == since and team_name not in refetched)
+                ]
+                kept_since = kept_since or any(h['date'] == since for h in records_by_team[team_name][-1:])
+        start = {team_name: records[-1] if records else {'wins': 0, 'losses': 0}
+                 for team_name, records in records_by_team.items()}
+        
+        # Build cumulative records for each team by date
+        won = (df['WL'] == 'W').astype(int)
+        history = pd.DataFrame({
+            'date': df['GAME_DATE'],
+            'wins': won.groupby(df['TEAM_NAME']).cumsum()
+                    + df['TEAM_NAME'].map({t: r['wins'] for t, r in start.items()}).fillna(0).astype(int),
+            'losses': (1 - won).groupby(df['TEAM_NAME']).cumsum()
+                      + df['TEAM_NAME'].map({t: r['losses'] for t, r in start.items()}).fillna(0).astype(int),
+        })
+        history['win_pct'] = history['wins'] / (history['wins'] + history['losses'])
+        
+        for team_name, team_history in history.groupby(df['TEAM_NAME'], sort=False):
+            records_by_team.setdefault(team_name, []).extend(team_history.to_dict('records'))
+        
+        new_records = {}
+        for team_name, records in records_by_team.items():
+            last = records[-1] if records else {'wins': 0, 'losses': 0}
+            new_records[team_name] = {'wins': last['wins'], 'losses': last['losses'], 'history': records}
+        
+        new_dates = set(df['GAME_DATE'].unique().tolist())
+        if since:
+            new_dates.update(d for d in dates if d < since or (d == since and kept_since))
+        
+        return new_records, sorted(new_dates)
+        
+    except Exception as e:
+        print(f"Error fetching historical standings: {e}")
+        return None, None
 
 
 def calculate_friend_historical_standings(team_records, dates):
@@ -307,58 +480,45 @@ def calculate_friend_historical_standings(team_records, dates):
     if not team_records or not dates:
         return None
     
+    # Long table of every team's cumulative record after each game day
+    records_df = pd.DataFrame(
+        [(team, record['date'], record['wins'], record['losses'])
+         for team, team_rec in team_records.items()
+         for record in team_rec['history']],
+        columns=['team', 'date', 'wins', 'losses'],
+    ).drop_duplicates(['team', 'date'], keep='last')
+    
+    # Wide date x team tables, forward-filled so each date carries the most
+    # recent record on or before it (0 before a team's first game)
+    all_dates = sorted(set(dates) | set(records_df['date']))
+    
+    def _wide(values):
+        return (records_df.pivot(index='date', columns='team', values=values)
+                .reindex(index=all_dates, columns=list(team_records))
+                .ffill().fillna(0)
+                .reindex(dates))
+    
+    wins_wide = _wide('wins')
+    losses_wide = _wide('losses')
+    team_index = index_team_data(team_records)
+    
     friend_history = {}
     
     for friend, teams in TEAM_ASSIGNMENTS.items():
-        friend_history[friend] = []
+        columns = [team_index[team] for team in teams if team in team_index]
+        total_wins = wins_wide[columns].sum(axis=1)
+        total_games = total_wins + losses_wide[columns].sum(axis=1)
+        win_pct = (total_wins / total_games * 100).where(total_games > 0, 0)
         
-        for date in dates:
-            total_wins = 0
-            total_losses = 0
-            
-            for team in teams:
-                # Use exact team name matching from TEAM_ASSIGNMENTS
-                if team in team_records and team_records[team]['history']:
-                    # Find the most recent game on or before this date
-                    latest_wins = 0
-                    latest_losses = 0
-                    for record in team_records[team]['history']:
-                        if record['date'] <= date:
-                            latest_wins = record['wins']
-                            latest_losses = record['losses']
-                    
-                    total_wins += latest_wins
-                    total_losses += latest_losses
-            
-            total_games = total_wins + total_losses
-            win_pct = (total_wins / total_games * 100) if total_games > 0 else 0
-            
-            friend_history[friend].append({
-                'date': date,
-                'win_pct': win_pct
-            })
+        friend_history[friend] = [
+            {'date': date, 'win_pct': float(pct)}
+            for date, pct in zip(dates, win_pct)
+        ]
     
     return friend_history
 
 
-def fetch_fivethirtyeight_projections():
-    """
-    Calculate simple win projections based on current performance
-    Since FiveThirtyEight's API structure has changed, we'll use a simple
-    pythagorean expectation model based on current stats
-    """
-    try:
-        # We'll calculate this from current team stats instead
-        # This is a placeholder - will be calculated from actual data
-        print(f"  Using pythagorean expectation for projections")
-        return {}
-        
-    except Exception as e:
-        print(f"Error calculating projections: {e}")
-        return None
-
-
-def calculate_projected_standings(current_stats, projections):
+def calculate_projected_standings(current_stats):
     """
     Calculate projected final wins for each friend
     Uses pythagorean expectation: current win% applied to remaining games
@@ -366,145 +526,101 @@ def calculate_projected_standings(current_stats, projections):
     if not current_stats:
         return None
     
-    projected_totals = {}
+    team_index = index_team_data(current_stats)
     
-    for friend, teams in TEAM_ASSIGNMENTS.items():
-        total_projected_wins = 0
-        
-        for team in teams:
-            # Use exact team name matching from TEAM_ASSIGNMENTS
-            if team in current_stats:
-                team_data = current_stats[team]
-                current_wins = team_data.get('wins', 0)
-                current_losses = team_data.get('losses', 0)
-                games_played = current_wins + current_losses
-                
-                if games_played > 0:
-                    # Calculate win percentage
-                    win_pct = current_wins / games_played
-                    
-                    # Project over 82 games
-                    projected_wins = win_pct * 82
-                    total_projected_wins += projected_wins
-        
-        projected_totals[friend] = {
-            'projected_wins': round(total_projected_wins, 1)
-        }
+    # Project each team's current win% over 82 games, then sum per friend
+    stats_df = pd.DataFrame.from_dict(current_stats, orient='index').reindex(columns=['wins', 'losses'])
+    games_played = stats_df['wins'].fillna(0) + stats_df['losses'].fillna(0)
+    projected = (stats_df['wins'].fillna(0) / games_played * 82).where(games_played > 0, 0).rename('projected')
+    assigned = pd.DataFrame(
+        [(friend, team_index[team])
+         for friend, teams in TEAM_ASSIGNMENTS.items()
+         for team in teams if team in team_index],
+        columns=['friend', 'team'],
+    ).join(projected, on='team')
+    sums = assigned.groupby('friend')['projected'].sum().reindex(list(TEAM_ASSIGNMENTS)).fillna(0)
+    
+    projected_totals = {
+        friend: {'projected_wins': round(float(total), 1)}
+        for friend, total in sums.items()
+    }
     
     print(f"  Calculated projections for {len(projected_totals)} participants")
     return projected_totals
 
 
+def _live_team_name(team):
+    """Full team name (city + name) from a live scoreboard team entry"""
+    return f"{team.get('teamCity', '')} {team.get('teamName', '')}".strip()
+
+
 def fetch_todays_games():
     """
     Fetch today's NBA games and map teams to friends.
     Falls back to live scoreboard API if stats API hasn't populated team IDs yet.
     """
-    max_retries = 3
-    retry_delay = 5
-    
-    for attempt in range(max_retries):
-        try:
-            from datetime import datetime
-            time.sleep(0.6)
-            
-            today = datetime.now().strftime('%m/%d/%Y')
-            scoreboard = scoreboardv2.ScoreboardV2(game_date=today, timeout=60)
-            games_df = scoreboard.get_data_frames()[0]
-            
-            if len(games_df) == 0:
-                return []
-            
-            # Get team ID to name mapping
-            all_teams = teams.get_teams()
-            team_map = {team['id']: team['full_name'] for team in all_teams}
-            
-            # Create reverse mapping from team to friend - use exact team names from TEAM_ASSIGNMENTS
-            team_to_friend = {}
-            for friend, teams_list in TEAM_ASSIGNMENTS.items():
-                for team in teams_list:
-                    team_to_friend[team] = friend
-            
-            # Check if we need to use live scoreboard API as fallback
-            has_null_teams = any(
-                game['HOME_TEAM_ID'] is None or game['VISITOR_TEAM_ID'] is None 
-                for _, game in games_df.iterrows()
-            )
-            
-            live_games = {}
-            if has_null_teams:
-                # Fall back to live scoreboard API which updates earlier
-                try:
-                    from nba_api.live.nba.endpoints import scoreboard as live_scoreboard
-                    time.sleep(0.6)
-                    board = live_scoreboard.ScoreBoard()
-                    games_dict = board.get_dict()
-                    
-                    # Index live games by position for matching
-                    for idx, game in enumerate(games_dict['scoreboard']['games']):
-                        away_team = game.get('awayTeam', {})
-                        home_team = game.get('homeTeam', {})
-                        # Build full team names (city + name)
-                        away_name = f"{away_team.get('teamCity', '')} {away_team.get('teamName', '')}".strip()
-                        home_name = f"{home_team.get('teamCity', '')} {home_team.get('teamName', '')}".strip()
-                        status = game.get('gameStatusText', 'TBD')
-                        
-                        live_games[idx] = {
-                            'visitor': away_name,
-                            'home': home_name,
-                            'time': status
-                        }
-                except Exception as e:
-                    print(f"Live scoreboard fallback failed: {e}")
-            
-            # Build games list
-            todays_games = []
-            seen_games = set()  # Track unique games to avoid API duplicates
-            
-            for idx, game in games_df.iterrows():
-                home_id = game['HOME_TEAM_ID']
-                visitor_id = game['VISITOR_TEAM_ID']
-                game_time = game['GAME_STATUS_TEXT']
-                
-                # Use live API data if team IDs are not populated
-                if (home_id is None or visitor_id is None) and idx in live_games:
-                    home_name = live_games[idx]['home']
-                    visitor_name = live_games[idx]['visitor']
-                    game_time = live_games[idx]['time']
-                elif home_id is None or visitor_id is None:
-                    # Skip games where teams are not yet determined and no fallback available
-                    continue
-                else:
-                    home_name = team_map.get(home_id, 'Unknown')
-                    visitor_name = team_map.get(visitor_id, 'Unknown')
-                
-                # Skip duplicate games (NBA API sometimes returns duplicates)
-                game_key = f"{visitor_name}@{home_name}"
-                if game_key in seen_games:
-                    continue
-                seen_games.add(game_key)
-                
-                # Normalize team names to match TEAM_ASSIGNMENTS
-                home_name_normalized = normalize_team_name(home_name)
-                visitor_name_normalized = normalize_team_name(visitor_name)
+    try:
+        today = datetime.now().strftime('%m/%d/%Y')
+        scoreboard = _nba_api_call(scoreboardv2.ScoreboardV2, game_date=today, timeout=60)
+        games_df = scoreboard.get_data_frames()[0]
+        
+        if len(games_df) == 0:
+            return []
+        
+        # Check if we need to use live scoreboard API as fallback. Unpopulated IDs
+        # arrive as None or NaN depending on the column dtype; both count as missing
+        # (a NaN ID used to slip through as valid and come out as 'Unknown')
+        null_teams = games_df[['HOME_TEAM_ID', 'VISITOR_TEAM_ID']].isna().any(axis=1)
+        
+        live_games = {}
+        if null_teams.any():
+            # Fall back to live scoreboard API which updates earlier
+            try:
+                from nba_api.live.nba.endpoints import scoreboard as live_scoreboard
+                board = _nba_api_call(live_scoreboard.ScoreBoard)
+                games_dict = board.get_dict()
                 
-                todays_games.append({
-                    'visitor': visitor_name,
-                    'home': home_name,
-                    'time': game_time,
-                    'visitor_friend': team_to_friend.get(visitor_name_normalized, None),
-                    'home_friend': team_to_friend.get(home_name_normalized, None)
-                })
-            
-            return todays_games
-            
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"Attempt {attempt + 1} fetching today's games failed: {e}. Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                print(f"Error fetching today's games after {max_retries} attempts: {e}")
-                return []
+                # Index live games by position for matching
+                live_games = {
+                    idx: {
+                        'visitor': _live_team_name(game.get('awayTeam', {})),
+                        'home': _live_team_name(game.get('homeTeam', {})),
+                        'time': game.get('gameStatusText', 'TBD'),
+                    }
+                    for idx, game in enumerate(games_dict['scoreboard']['games'])
+                }
+            except Exception as e:
+                print(f"Live scoreboard fallback failed: {e}")
+        
+        # Build games list
+        games = pd.DataFrame({
+            'visitor': games_df['VISITOR_TEAM_ID'].map(TEAM_ID_TO_NAME).fillna('Unknown'),
+            'home': games_df['HOME_TEAM_ID'].map(TEAM_ID_TO_NAME).fillna('Unknown'),
+            'time': games_df['GAME_STATUS_TEXT'],
+        })
+        
+        # Use live API data if team IDs are not populated; skip games where
+        # teams are not yet determined and no fallback is available
+        for idx in games.index[null_teams]:
+            if idx in live_games:
+                games.loc[idx, ['visitor', 'home', 'time']] = [
+                    live_games[idx]['visitor'], live_games[idx]['home'], live_games[idx]['time']
+                ]
+        games = games[~null_teams | games.index.isin(list(live_games))]
+        
+        # Skip duplicate games (NBA API sometimes returns duplicates)
+        games = games.drop_duplicates(subset=['visitor', 'home'])
+        
+        # Normalize team names to match TEAM_ASSIGNMENTS
+        games['visitor_friend'] = normalize_team_names(games['visitor']).map(TEAM_TO_FRIEND)
+        games['home_friend'] = normalize_team_names(games['home']).map(TEAM_TO_FRIEND)
+        games = games.astype(object).where(games.notna(), None)
+        
+        return games.to_dict('records')
+        
+    except Exception as e:
+        print(f"Error fetching today's games: {e}")
+        return []
 
 
 def fetch_yesterdays_games():
@@ -512,100 +628,70 @@ def fetch_yesterdays_games():
     Fetch yesterday's NBA games with results and map teams to friends
     Uses game log to get final scores
     """
-    max_retries = 3
-    retry_delay = 5
-    
-    for attempt in range(max_retries):
-        try:
-            from datetime import datetime, timedelta
-            time.sleep(0.6)
-            
-            yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-            
-            # Get game log for yesterday
-            gamelog = leaguegamelog.LeagueGameLog(
-                season='2025-26',
-                season_type_all_star='Regular Season',
-                date_from_nullable=yesterday,
-                date_to_nullable=yesterday,
-                timeout=60
-            )
-            
-            df = gamelog.get_data_frames()[0]
-            
-            if len(df) == 0:
-                return []
-            
-            # Get team ID to name mapping
-            all_teams = teams.get_teams()
-            team_map = {team['id']: team['full_name'] for team in all_teams}
-            
-            # Create reverse mapping from team to friend - use exact team names from TEAM_ASSIGNMENTS
-            team_to_friend = {}
-            for friend, teams_list in TEAM_ASSIGNMENTS.items():
-                for team in teams_list:
-                    team_to_friend[team] = friend
-            
-            # Group by game (each game appears twice - once for each team)
-            games_dict = {}
-            for _, row in df.iterrows():
-                game_id = row['GAME_ID']
-                matchup = row['MATCHUP']
-                team_name = row['TEAM_NAME']
-                points = int(row['PTS'])
-                wl = row['WL']
-                
-                if game_id not in games_dict:
-                    games_dict[game_id] = {
-                        'matchup': matchup,
-                        'teams': []
-                    }
-                
-                games_dict[game_id]['teams'].append({
-                    'name': team_name,
-                    'points': points,
-                    'is_home': '@' not in matchup,  # If no @ in matchup, this team is home
-                    'wl': wl
-                })
-            
-            # Build games list with scores
-            yesterdays_games = []
-            for game_id, game_info in games_dict.items():
-                if len(game_info['teams']) == 2:
-                    # Determine which is home and which is visitor
-                    team1, team2 = game_info['teams']
-                    
-                    if team1['is_home']:
-                        home = team1
-                        visitor = team2
-                    else:
-                        home = team2
-                        visitor = team1
-                    
-                    # Normalize team names to match TEAM_ASSIGNMENTS
-                    visitor_name_normalized = normalize_team_name(visitor['name'])
-                    home_name_normalized = normalize_team_name(home['name'])
-                    
-                    yesterdays_games.append({
-                        'visitor': visitor['name'],
-                        'home': home['name'],
-                        'visitor_score': visitor['points'],
-                        'home_score': home['points'],
-                        'visitor_friend': team_to_friend.get(visitor_name_normalized, None),
-                        'home_friend': team_to_friend.get(home_name_normalized, None)
-                    })
-            
-            return yesterdays_games
-            
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"Attempt {attempt + 1} fetching yesterday's games failed: {e}. Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                print(f"Error fetching yesterday's games after {max_retries} attempts: {e}")
-                import traceback
-                traceback.print_exc()
-                return []
+    try:
+        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        
+        # Get game log for yesterday
+        gamelog = _nba_api_call(
+            leaguegamelog.LeagueGameLog,
+            season='2025-26',
+            season_type_all_star='Regular Season',
+            date_from_nullable=yesterday,
+            date_to_nullable=yesterday,
+            timeout=60
+        )
+        
+        df = gamelog.get_data_frames()[0]
+        
+        if len(df) == 0:
+            return []
+        
+        # Each game appears twice - once for each team. Pair the home row
+        # (no @ in matchup) with the visitor row on GAME_ID.
+        df = df[df.groupby('GAME_ID')['GAME_ID'].transform('size') == 2]
+        df = df.assign(order=range(len(df)), is_home=~df['MATCHUP'].str.contains('@', regex=False))
+        games = df[df['is_home']].merge(df[~df['is_home']], on='GAME_ID', suffixes=('_home', '_away'))
+        games = games.assign(order=games[['order_home', 'order_away']].min(axis=1)).sort_values('order')
+        
+        # Normalize team names to match TEAM_ASSIGNMENTS
+        yesterdays_games = pd.DataFrame({
+            'visitor': games['TEAM_NAME_away'],
+            'home': games['TEAM_NAME_home'],
+            'visitor_score': games['PTS_away'].astype(int),
+            'home_score': games['PTS_home'].astype(int),
+            'visitor_friend': normalize_team_names(games['TEAM_NAME_away']).map(TEAM_TO_FRIEND),
+            'home_friend': normalize_team_names(games['TEAM_NAME_home']).map(TEAM_TO_FRIEND),
+        })
+        yesterdays_games = yesterdays_games.astype(object).where(yesterdays_games.notna(), None)
+        
+        return yesterdays_games.to_dict('records')
+        
+    except Exception as e:
+        print(f"Error fetching yesterday's games: {e}")
+        import traceback
+        traceback.print_exc()
+        return []
+
+
+# In-process cache of raw ESPN scoreboard responses: date_str -> (fetched_at, ttl, entry)
+_SCOREBOARD_CACHE = {}
+SCOREBOARD_TTL_TODAY = 60  # seconds; live scores change quickly
+SCOREBOARD_TTL_FUTURE = 10 * 60  # seconds
+
+
+def _scoreboard_ttl(date_str, data):
+    """
+    How long a scoreboard response stays fresh. Past dates whose games are all
+    final never change, so they are kept for the life of the process (None).
+    """
+    today = datetime.now().strftime('%Y%m%d')
+    if date_str and date_str < today:
+        events = data.get('events', [])
+        if all(e.get('status', {}).get('type', {}).get('completed', False) for e in events):
+            return None
+    if date_str and date_str > today:
+        return SCOREBOARD_TTL_FUTURE
+    return SCOREBOARD_TTL_TODAY
 
 
 def fetch_espn_scoreboard(date_str=None):
@@ -616,18 +702,16 @@ def fetch_espn_scoreboard(date_str=None):
     """
     try:
         url = "https://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard"
-        if date_str:
-            url += f"?dates={date_str}"
+        params = {'dates': date_str} if date_str else None
         
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Create reverse mapping from team to friend
-        team_to_friend = {}
-        for friend, teams_list in TEAM_ASSIGNMENTS.items():
-            for team in teams_list:
-                team_to_friend[team] = friend
+        cached = _SCOREBOARD_CACHE.get(date_str)
+        if cached and (cached[1] is None or time.time() - cached[0] < cached[1]):
+            data = cached[2]['body']
+        else:
+            # Revalidate an expired entry instead of re-downloading it
+            entry = _fetch_json(url, params=params, cached=cached[2] if cached else None)
+            data = entry['body']
+            _SCOREBOARD_CACHE[date_str] = (time.time(), _scoreboard_ttl(date_str, data), entry)
         
         games = []
         for event in data.get('events', []):
@@ -649,8 +733,8 @@ def fetch_espn_scoreboard(date_str=None):
                     'visitor_score': away_score,
                     'home_score': home_score,
                     'time': status_detail,
-                    'visitor_friend': team_to_friend.get(away_team, None),
-                    'home_friend': team_to_friend.get(home_team, None),
+                    'visitor_friend': TEAM_TO_FRIEND.get(away_team),
+                    'home_friend': TEAM_TO_FRIEND.get(home_team),
                     'is_final': is_final
                 })
         
@@ -669,7 +753,6 @@ def fetch_todays_games_espn():
 
 def fetch_yesterdays_games_espn():
     """Fetch yesterday's completed games from ESPN API using explicit date."""
-    from datetime import timedelta
     yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
     games = fetch_espn_scoreboard(yesterday)
     return [g for g in games if g.get('is_final')]
@@ -681,8 +764,6 @@ def update_historical_from_espn(team_records, dates):
     Fetches recent days' scoreboards and appends W/L results for each team.
     Returns updated team_records and dates.
     """
-    from datetime import timedelta
-    
     if not team_records or not dates:
         print("No existing historical data to update")
         return team_records, dates
@@ -691,16 +772,22 @@ def update_historical_from_espn(team_records, dates):
     last_dt = datetime.strptime(last_date, '%Y-%m-%d')
     today = datetime.now()
     
-    # Fetch each missing day
-    current = last_dt + timedelta(days=1)
+    # Every missing day from the one after the last cached date up to yesterday
+    gap_days = (today.date() - last_dt.date()).days - 1
+    pending = [last_dt + timedelta(days=i) for i in range(1, gap_days + 1)]
     new_dates_added = 0
     
-    while current.date() < today.date():
-        date_espn = current.strftime('%Y%m%d')
+    print(f"  Fetching results for {len(pending)} missing day(s)...")
+    pending_espn = [day.strftime('%Y%m%d') for day in pending]
+    if len(pending) > 1:
+        # Network-bound, so fetch the days concurrently; results come back in date order
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            scoreboards = list(executor.map(fetch_espn_scoreboard, pending_espn))
+    else:
+        scoreboards = [fetch_espn_scoreboard(d) for d in pending_espn]
+    
+    for current, games in zip(pending, scoreboards):
         date_iso = current.strftime('%Y-%m-%d')
-        
-        print(f"  Fetching results for {date_iso}...")
-        games = fetch_espn_scoreboard(date_espn)
         completed = [g for g in games if g.get('is_final')]
         
         if completed:
@@ -716,10 +803,7 @@ def update_historical_from_espn(team_records, dates):
                 home_won = home_score > visitor_score if home_score and visitor_score else False
                 
                 for team_name, won in [(home, home_won), (visitor, not home_won)]:
-                    if team_name not in team_records:
-                        team_records[team_name] = {'wins': 0, 'losses': 0, 'history': []}
-                    
-                    rec = team_records[team_name]
+                    rec = team_records.setdefault(team_name, {'wins': 0, 'losses': 0, 'history': []})
                     if won:
                         rec['wins'] += 1
                     else:
@@ -732,9 +816,6 @@ def update_historical_from_espn(team_records, dates):
                         'losses': rec['losses'],
                         'win_pct': rec['wins'] / total if total > 0 else 0
                     })
-        
-        current += timedelta(days=1)
-        time.sleep(0.3)  # Be nice to ESPN
     
     print(f"  Added {new_dates_added} new dates to historical data")
     return team_records, dates
@@ -743,6 +824,21 @@ def update_historical_from_espn(team_records, dates):
 # Module-level cache for the full season schedule
 # List of {"date": "YYYY-MM-DD", "home": "Team Name", "away": "Team Name"} dicts
 _full_season_schedule = None
+# Parallel list of each game's date, for bisecting to today's games
+_schedule_dates = []
+
+
+def _set_season_schedule(schedule):
+    """Store the season schedule (sorted by date) along with its date index"""
+    global _full_season_schedule, _schedule_dates
+    # Only 30 distinct team names; interning shares one copy per name across
+    # ~1230 games and lets TEAM_TO_FRIEND lookups match by identity
+    for game in schedule:
+        game['home'] = sys.intern(game['home'])
+        game['away'] = sys.intern(game['away'])
+    _full_season_schedule = schedule
+    _schedule_dates = [game['date'] for game in schedule]
+
 
 # ESPN team name -> ESPN team ID mapping
 ESPN_TEAM_IDS = {
@@ -758,6 +854,14 @@ ESPN_TEAM_IDS = {
     "Toronto Raptors": 28, "Utah Jazz": 26, "Washington Wizards": 27,
 }
 
+# ESPN IDs of the 30 NBA franchises, as strings to match ESPN payloads
+_NBA_ESPN_TEAM_IDS = frozenset(str(espn_id) for espn_id in ESPN_TEAM_IDS.values())
+
+
+def _espn_team_id(competitor):
+    """ESPN team ID of a scoreboard/schedule competitor, as a string"""
+    return str(competitor.get('id') or competitor.get('team', {}).get('id', ''))
+
 
 def load_season_schedule(cached_schedule=None):
     """
@@ -767,13 +871,11 @@ def load_season_schedule(cached_schedule=None):
     cached_schedule: list from nba_data_cache.json['full_season_schedule'], or None
     Returns the full schedule list, or None if fetch fails.
     """
-    global _full_season_schedule
-    
     if _full_season_schedule is not None:
         return _full_season_schedule
     
     if cached_schedule:
-        _full_season_schedule = cached_schedule
+        _set_season_schedule(cached_schedule)
         print(f"Loaded cached season schedule: {len(cached_schedule)} games")
         return _full_season_schedule
     
@@ -789,64 +891,64 @@ def _fetch_season_schedule_from_espn() -> list:
     plus all remaining teams to get the complete schedule.
     Returns list of {"date": "YYYY-MM-DD", "home": "...", "away": "..."} dicts.
     """
-    global _full_season_schedule
-    
     try:
-        all_games = []
-        seen_game_ids = set()
-        
-        # Collect all unique teams from TEAM_ASSIGNMENTS (excluding duplicates)
-        all_assigned_teams = set()
-        for friend, teams_list in TEAM_ASSIGNMENTS.items():
-            for team in teams_list:
-                all_assigned_teams.add(team)
+        # All unique teams from TEAM_ASSIGNMENTS
+        all_assigned_teams = set(TEAM_TO_FRIEND)
         
         print(f"  Fetching schedules for {len(all_assigned_teams)} assigned teams...")
         
+        team_ids = []
         for team_name in sorted(all_assigned_teams):
             espn_id = ESPN_TEAM_IDS.get(team_name)
             if not espn_id:
                 print(f"  ⚠️  No ESPN ID for {team_name}")
                 continue
+            team_ids.append((team_name, espn_id))
+        
+        def fetch_team_schedule(espn_id):
+            url = f"https://site.api.espn.com/apis/site/v2/sports/basketball/nba/teams/{espn_id}/schedule"
+            return _get_json(url, params={'season': 2026}, ttl=SCHEDULE_CACHE_TTL)
+        
+        # Network-bound, so fetch all teams concurrently; results come back in team order
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(fetch_team_schedule, [espn_id for _, espn_id in team_ids]))
+        
+        # Each game shows up in both teams' schedules; keep the first copy of each
+        events_by_id = {}
+        for (team_name, _), data in zip(team_ids, responses):
+            events = data.get('events', [])
+            for event in events:
+                events_by_id.setdefault(event.get('id'), event)
+            print(f"    {team_name}: {len(events)} games (unique so far: {len(events_by_id)})")
+        
+        all_games = []
+        for event in events_by_id.values():
+            comps = event.get('competitions', [{}])[0]
+            competitors = comps.get('competitors', [])
+            if len(competitors) != 2:
+                continue
             
-            url = f"https://site.api.espn.com/apis/site/v2/sports/basketball/nba/teams/{espn_id}/schedule?season=2026"
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            data = response.json()
+            # Skip exhibition/All-Star events, which can't be head-to-head games
+            if not all(_espn_team_id(competitor) in _NBA_ESPN_TEAM_IDS for competitor in competitors):
+                continue
             
-            team_new = 0
-            for event in data.get('events', []):
-                game_id = event.get('id')
-                if game_id in seen_game_ids:
-                    continue
-                seen_game_ids.add(game_id)
-                
-                # Parse date (ESPN gives ISO format like "2025-10-22T23:30Z")
-                event_date_str = event.get('date', '')
-                try:
-                    game_date = datetime.strptime(event_date_str[:10], '%Y-%m-%d').strftime('%Y-%m-%d')
-                except (ValueError, IndexError):
-                    continue
-                
-                comps = event.get('competitions', [{}])[0]
-                competitors = comps.get('competitors', [])
-                if len(competitors) == 2:
-                    home_team = competitors[0].get('team', {}).get('displayName', 'Unknown')
-                    away_team = competitors[1].get('team', {}).get('displayName', 'Unknown')
-                    all_games.append({
-                        'date': game_date,
-                        'home': home_team,
-                        'away': away_team,
-                    })
-                    team_new += 1
+            # ESPN gives ISO dates like "2025-10-22T23:30Z"; keep the YYYY-MM-DD prefix
+            game_date = (event.get('date') or '')[:10]
+            if len(game_date) != 10 or game_date[4] != '-' or game_date[7] != '-':
+                continue
             
-            print(f"    {team_name}: +{team_new} new games (total: {len(all_games)})")
-            time.sleep(0.2)  # Be nice to ESPN
+            home_team = competitors[0].get('team', {}).get('displayName', 'Unknown')
+            away_team = competitors[1].get('team', {}).get('displayName', 'Unknown')
+            all_games.append({
+                'date': game_date,
+                'home': home_team,
+                'away': away_team,
+            })
         
         # Sort by date
         all_games.sort(key=lambda g: g['date'])
         
-        _full_season_schedule = all_games
+        _set_season_schedule(all_games)
         print(f"  ✅ Full season schedule: {len(all_games)} games")
         return all_games
     
@@ -857,10 +959,11 @@ def _fetch_season_schedule_from_espn() -> list:
         return []
 
 
-def get_remaining_head_to_head() -> Dict[str, int]:
+def get_remaining_head_to_head(today_str: str = None) -> Dict[str, int]:
     """
     Count future games where two of the same friend's teams play each other.
     Uses the cached full-season schedule and filters to games on or after today.
+    today_str: 'YYYY-MM-DD' to count from; defaults to today's date
     
     Returns a dict of {friend_name: number_of_intra_team_games_remaining}
     """
@@ -868,53 +971,49 @@ def get_remaining_head_to_head() -> Dict[str, int]:
         print("No season schedule available for H2H calculation")
         return {}
     
-    today_str = datetime.now().strftime('%Y-%m-%d')
-    
-    # Build reverse lookup: team_name -> friend
-    team_to_friend = {}
-    for friend, friend_teams in TEAM_ASSIGNMENTS.items():
-        for team in friend_teams:
-            team_to_friend[team] = friend
+    if today_str is None:
+        today_str = date.today().isoformat()
     
-    head_to_head_counts = {}
-    for game in _full_season_schedule:
-        # Only count games on or after today
-        if game['date'] < today_str:
-            continue
-        
-        home_friend = team_to_friend.get(game['home'])
-        away_friend = team_to_friend.get(game['away'])
-        
-        if (home_friend and away_friend 
-                and home_friend == away_friend 
-                and home_friend != 'Undrafted'):
-            head_to_head_counts[home_friend] = head_to_head_counts.get(home_friend, 0) + 1
+    head_to_head_counts = Counter()
+    # Only count games on or after today; the schedule is sorted by date
+    start = bisect.bisect_left(_schedule_dates, today_str)
+    for game in _full_season_schedule[start:]:
+        home_friend = TEAM_TO_FRIEND.get(game['home'])
+        if (home_friend and home_friend != 'Undrafted'
+                and TEAM_TO_FRIEND.get(game['away']) == home_friend):
+            head_to_head_counts[home_friend] += 1
     
+    head_to_head_counts = dict(head_to_head_counts)
     print(f"Head-to-head remaining: {head_to_head_counts}")
     return head_to_head_counts
 
 
-def calculate_friend_totals(team_data: Dict) -> Dict:
+def calculate_friend_totals(team_data: Dict, team_index: Dict = None) -> Dict:
     """
     Calculate total wins and stats for each friend based on their drafted teams
+    team_index: optional result of index_team_data(team_data), to avoid rebuilding it
     """
     friend_totals = {}
+    if team_index is None:
+        team_index = index_team_data(team_data)
+    
+    # One row per drafted team, summed per friend in a single groupby
+    stat_cols = ['wins', 'losses', 'total_plus_minus', 'games_played']
+    stats_df = pd.DataFrame.from_dict(team_data, orient='index').reindex(columns=stat_cols)
+    assigned = pd.DataFrame(
+        [(friend, team_index[team])
+         for friend, teams in TEAM_ASSIGNMENTS.items()
+         for team in teams if team in team_index],
+        columns=['friend', 'team'],
+    ).join(stats_df, on='team')
+    sums = (assigned.groupby('friend')[stat_cols].sum()
+            .reindex(list(TEAM_ASSIGNMENTS)).fillna(0))
     
     for friend, teams in TEAM_ASSIGNMENTS.items():
-        total_wins = 0
-        total_losses = 0
-        total_plus_minus = 0
-        total_games_played = 0
-        team_count = 0
-        
-        for team in teams:
-            # Use exact team name matching from TEAM_ASSIGNMENTS
-            if team in team_data:
-                total_wins += team_data[team].get('wins', 0)
-                total_losses += team_data[team].get('losses', 0)
-                total_plus_minus += team_data[team].get('total_plus_minus', 0)
-                total_games_played += team_data[team].get('games_played', 0)
-                team_count += 1
+        total_wins = int(sums.at[friend, 'wins'])
+        total_losses = int(sums.at[friend, 'losses'])
+        total_plus_minus = float(sums.at[friend, 'total_plus_minus'])
+        total_games_played = int(sums.at[friend, 'games_played'])
         
         # Calculate games remaining (82 games per team)
         total_possible_games = len(teams) * 82
@@ -959,24 +1058,24 @@ def calculate_friend_totals(team_data: Dict) -> Dict:
     # A friend is eliminated if, even winning ALL remaining games (accounting for
     # intra-team head-to-head matchups), they'd still have fewer total wins than
     # the leader's minimum guaranteed wins.
-    for friend in friend_totals:
+    # Max possible wins = current wins + remaining games - head-to-head matchups
+    # (each h2h game means one of those "remaining" is a guaranteed loss, not a possible win).
+    # Minimum guaranteed wins: current wins are locked in, plus 1 guaranteed win per h2h game.
+    max_possible = {}
+    guaranteed = {}
+    for friend, totals in friend_totals.items():
         if friend == "Undrafted":
             continue
-        
-        # Max possible wins = current wins + remaining games - head-to-head matchups
-        # (each h2h game means one of those "remaining" is a guaranteed loss, not a possible win)
-        h2h_penalty = friend_totals[friend]['h2h_remaining']
-        max_possible_wins = friend_totals[friend]['total_wins'] + friend_totals[friend]['games_remaining'] - h2h_penalty
-        
-        # Find the best other friend's minimum guaranteed wins
-        # Their current wins are locked in, plus they get 1 guaranteed win per h2h game
-        best_other_min_wins = 0
-        for other_friend in friend_totals:
-            if other_friend == friend or other_friend == "Undrafted":
-                continue
-            
-            other_guaranteed_wins = friend_totals[other_friend]['total_wins'] + friend_totals[other_friend]['h2h_remaining']
-            best_other_min_wins = max(best_other_min_wins, other_guaranteed_wins)
+        h2h = totals['h2h_remaining']
+        max_possible[friend] = totals['total_wins'] + totals['games_remaining'] - h2h
+        guaranteed[friend] = totals['total_wins'] + h2h
+    
+    # The best other friend's minimum is the top guaranteed total, unless that
+    # friend is the top one, in which case it's the runner-up (ties included)
+    top_two = sorted(guaranteed.values(), reverse=True)[:2] + [0, 0]
+    
+    for friend, max_possible_wins in max_possible.items():
+        best_other_min_wins = top_two[1] if guaranteed[friend] == top_two[0] else top_two[0]
         
         # Eliminated if max possible wins can't reach the leader's minimum guaranteed wins (tie is acceptable)
         if max_possible_wins < best_other_min_wins:
@@ -985,74 +1084,91 @@ def calculate_friend_totals(team_data: Dict) -> Dict:
     return friend_totals
 
 
-def display_standings(friend_totals: Dict):
+# Precomputed layout for the standings table
+_STANDINGS_HEADER = f"{'Rank':<6} {'Friend':<15} {'Wins':<8} {'Losses':<8} {'Win %':<10} {'Pt Diff':<12}"
+_STANDINGS_ROW = "{rank:<6} {friend:<15} {total_wins:<8} {total_losses:<8} {win_pct:.3f}    {point_diff_per_game:>10.1f}".format
+_DETAIL_BLOCK = ("{rank}. {friend} - {total_wins} Wins\n"
+                 "   Teams: {teams}\n"
+                 "   Record: {total_wins}-{total_losses} ({win_pct:.1%})\n"
+                 "   Point Differential: {point_diff_per_game:+.1f} per game\n").format
+_TEAM_ROW = "   {name:<20} {wins:>3}-{losses:<3} ({win_pct:.3f})  {pts:.1f} PPG".format
+
+
+def rank_friends(friend_totals: Dict) -> List:
+    """
+    Sort friends by total wins (descending), returning (friend, stats) pairs
+    """
+    return sorted(friend_totals.items(), key=lambda x: x[1]['total_wins'], reverse=True)
+
+
+def display_standings(sorted_friends: List):
     """
     Display the current standings for the friends draft challenge
+    sorted_friends: (friend, stats) pairs as returned by rank_friends
     """
-    print("\n" + "="*80)
-    print("NBA FRIENDS DRAFT CHALLENGE - CURRENT STANDINGS")
-    print(f"Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("="*80 + "\n")
+    # Collect each section and write it in one call rather than a print per line
+    lines = [
+        "\n" + "="*80,
+        "NBA FRIENDS DRAFT CHALLENGE - CURRENT STANDINGS",
+        f"Updated: {datetime.now():%Y-%m-%d %H:%M:%S}",
+        "="*80 + "\n",
+        _STANDINGS_HEADER,
+        "-" * 80,
+    ]
+    lines.extend(_STANDINGS_ROW(rank=rank, friend=friend, **stats)
+                 for rank, (friend, stats) in enumerate(sorted_friends, 1))
+    sys.stdout.write("\n".join(lines) + "\n")
     
-    # Sort by total wins (descending)
-    sorted_friends = sorted(friend_totals.items(), key=lambda x: x[1]['total_wins'], reverse=True)
-    
-    print(f"{'Rank':<6} {'Friend':<15} {'Wins':<8} {'Losses':<8} {'Win %':<10} {'Pt Diff':<12}")
-    print("-" * 80)
-    
-    for rank, (friend, stats) in enumerate(sorted_friends, 1):
-        print(f"{rank:<6} {friend:<15} {stats['total_wins']:<8} {stats['total_losses']:<8} "
-              f"{stats['win_pct']:.3f}    {stats['point_differential']:>10.1f}")
-    
-    print("\n" + "="*80)
-    print("DETAILED BREAKDOWN")
-    print("="*80 + "\n")
-    
-    for rank, (friend, stats) in enumerate(sorted_friends, 1):
-        print(f"{rank}. {friend} - {stats['total_wins']} Wins")
-        print(f"   Teams: {', '.join(stats['teams'])}")
-        print(f"   Record: {stats['total_wins']}-{stats['total_losses']} ({stats['win_pct']:.1%})")
-        print(f"   Total Points Scored: {stats['total_pts_scored']:.1f}")
-        if stats['total_pts_allowed'] > 0:
-            print(f"   Total Points Allowed: {stats['total_pts_allowed']:.1f}")
-            print(f"   Point Differential: {stats['point_differential']:+.1f}")
-        print()
+    lines = [
+        "\n" + "="*80,
+        "DETAILED BREAKDOWN",
+        "="*80 + "\n",
+    ]
+    lines.extend(_DETAIL_BLOCK(rank=rank, friend=friend, **{**stats, 'teams': ', '.join(stats['teams'])})
+                 for rank, (friend, stats) in enumerate(sorted_friends, 1))
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
-def display_team_breakdown(team_data: Dict, friend_totals: Dict):
+def display_team_breakdown(team_data: Dict, sorted_friends: List, team_index: Dict = None):
     """
     Display individual team performance for each friend
+    sorted_friends: (friend, stats) pairs as returned by rank_friends
+    team_index: optional result of index_team_data(team_data), to avoid rebuilding it
     """
-    print("\n" + "="*80)
-    print("INDIVIDUAL TEAM PERFORMANCE")
-    print("="*80 + "\n")
+    if team_index is None:
+        team_index = index_team_data(team_data)
     
-    sorted_friends = sorted(friend_totals.items(), key=lambda x: x[1]['total_wins'], reverse=True)
+    lines = [
+        "\n" + "="*80,
+        "INDIVIDUAL TEAM PERFORMANCE",
+        "="*80 + "\n",
+    ]
     
     for rank, (friend, stats) in enumerate(sorted_friends, 1):
-        print(f"{rank}. {friend} ({stats['total_wins']} total wins)")
-        print("-" * 60)
+        lines.append(f"{rank}. {friend} ({stats['total_wins']} total wins)")
+        lines.append("-" * 60)
         
         team_records = []
         for team in stats['teams']:
-            # Use exact team name matching from TEAM_ASSIGNMENTS
-            if team in team_data:
-                team_info = team_data[team]
+            api_team = team_index.get(team)
+            if api_team is not None:
+                team_info = team_data[api_team]
+                games_played = team_info.get('games_played', 0)
                 team_records.append({
                     'name': team,
                     'wins': team_info.get('wins', 0),
                     'losses': team_info.get('losses', 0),
                     'win_pct': team_info.get('win_pct', 0),
-                    'pts': team_info.get('pts_scored', 0)
+                    'pts': team_info.get('total_pts_scored', 0) / games_played if games_played > 0 else 0
                 })
         
         # Sort by wins
         team_records.sort(key=lambda x: x['wins'], reverse=True)
         
-        for team_rec in team_records:
-            print(f"   {team_rec['name']:<20} {team_rec['wins']:>3}-{team_rec['losses']:<3} "
-                  f"({team_rec['win_pct']:.3f})  {team_rec['pts']:.1f} PPG")
-        print()
+        lines.extend(_TEAM_ROW(**team_rec) for team_rec in team_records)
+        lines.append("")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
@@ -1070,14 +1186,18 @@ def main():
     
     print(f"Successfully fetched data for {len(team_stats)} teams\n")
     
+    # Resolve drafted team names once; shared by the totals and the breakdown
+    team_index = index_team_data(team_stats)
+    
     # Calculate totals for each friend
-    friend_totals = calculate_friend_totals(team_stats)
+    friend_totals = calculate_friend_totals(team_stats, team_index)
+    sorted_friends = rank_friends(friend_totals)
     
     # Display standings
-    display_standings(friend_totals)
+    display_standings(sorted_friends)
     
     # Display individual team breakdown
-    display_team_breakdown(team_stats, friend_totals)
+    display_team_breakdown(team_stats, sorted_friends, team_index)
 
 
 if __name__ == "__main__":
@@ -4,8 +4,9 @@ Update NBA data locally and save to cache file for deployment.
 Uses ESPN API exclusively — no stats.nba.com dependency.
 """
 
-import json
 import os
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from nba_tracker import (
     fetch_team_stats,
@@ -15,6 +16,7 @@ from nba_tracker import (
     fetch_yesterdays_games_espn,
     update_historical_from_espn,
     load_season_schedule,
+    write_json_atomic,
 )
 
 CACHE_FILE = 'nba_data_cache.json'
@@ -23,45 +25,55 @@ CACHE_FILE = 'nba_data_cache.json'
 old_cache = {}
 if os.path.exists(CACHE_FILE):
     try:
-        with open(CACHE_FILE, 'r') as f:
-            old_cache = json.load(f)
+        with open(CACHE_FILE, 'rb') as f:
+            old_cache = orjson.loads(f.read())
         print(f"📂 Loaded existing cache (last updated: {old_cache.get('last_updated', 'unknown')})")
     except Exception:
         pass
 
-print("Fetching team stats from ESPN...")
-team_stats = fetch_team_stats()
+# The fetches below are independent network round-trips, so run them concurrently
+team_records = old_cache.get('team_records', {})
+dates = old_cache.get('dates', [])
 
-if team_stats:
-    print(f"✅ Got stats for {len(team_stats)} teams")
+with ThreadPoolExecutor(max_workers=5) as executor:
+    print("Fetching team stats from ESPN...")
+    stats_future = executor.submit(fetch_team_stats)
     
     # --- Season schedule: load from cache or fetch once from ESPN ---
-    cached_schedule = old_cache.get('full_season_schedule')
-    season_schedule = load_season_schedule(cached_schedule)
-    
-    print("Calculating friend totals...")
-    friend_totals = calculate_friend_totals(team_stats)
+    schedule_future = executor.submit(load_season_schedule, old_cache.get('full_season_schedule'))
     
     # --- Historical data: incremental update from cached data ---
     print("Updating historical data incrementally from ESPN...")
-    team_records = old_cache.get('team_records', {})
-    dates = old_cache.get('dates', [])
-    
+    history_future = None
     if team_records and dates:
         print(f"  Cached history has {len(dates)} dates through {dates[-1]}")
-        team_records, dates = update_historical_from_espn(team_records, dates)
+        history_future = executor.submit(update_historical_from_espn, team_records, dates)
+    
+    # --- Today's and yesterday's games from ESPN ---
+    print("Fetching today's and yesterday's games from ESPN...")
+    todays_future = executor.submit(fetch_todays_games_espn)
+    yesterdays_future = executor.submit(fetch_yesterdays_games_espn)
+    
+    team_stats = stats_future.result()
+    season_schedule = schedule_future.result()
+    if history_future is not None:
+        team_records, dates = history_future.result()
+    todays_games = todays_future.result()
+    yesterdays_games = yesterdays_future.result()
+
+if team_stats:
+    print(f"✅ Got stats for {len(team_stats)} teams")
+    
+    # Needs the season schedule loaded for head-to-head elimination
+    print("Calculating friend totals...")
+    friend_totals = calculate_friend_totals(team_stats)
+    
+    if history_future is not None:
         friend_history = calculate_friend_historical_standings(team_records, dates)
     else:
         print("  ⚠️  No cached historical data — keeping old friend_history if available")
         friend_history = old_cache.get('friend_history')
     
-    # --- Today's and yesterday's games from ESPN ---
-    print("Fetching today's games from ESPN...")
-    todays_games = fetch_todays_games_espn()
-    
-    print("Fetching yesterday's games from ESPN...")
-    yesterdays_games = fetch_yesterdays_games_espn()
-    
     cache_data = {
         'last_updated': datetime.now().isoformat(),
         'team_stats': team_stats,
@@ -74,8 +86,7 @@ if team_stats:
         'full_season_schedule': season_schedule,
     }
     
-    with open(CACHE_FILE, 'w') as f:
-        json.dump(cache_data, f, indent=2)
+    write_json_atomic(CACHE_FILE, cache_data)
     
     print(f"\n✅ Successfully fetched data for {len(team_stats)} teams")
     if season_schedule:
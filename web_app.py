@@ -3,23 +3,88 @@ NBA Standings Web Application
 Auto-updates every day at 6 AM EDT
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime
 import pytz
-import json
+import orjson
 import os
-from nba_tracker import fetch_team_stats, calculate_friend_totals, TEAM_ASSIGNMENTS, fetch_historical_standings, calculate_friend_historical_standings, load_season_schedule
+import gzip
+import hashlib
+import threading
+import time
+import fcntl
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from nba_tracker import fetch_team_stats, calculate_friend_totals, TEAM_ASSIGNMENTS, set_team_assignments, fetch_historical_standings, calculate_friend_historical_standings, load_season_schedule, index_team_data, write_json_atomic
 import glob
 
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson, so jsonify() of the full cached
+    standings (every team's game history) doesn't go through stdlib json
+    """
+    def dumps(self, obj, **kwargs):
+        # Datetimes go through Flask's default() so they keep its HTTP-date format
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Path to cache file
 CACHE_FILE = 'nba_data_cache.json'
 SEASON_CONFIG_FILE = 'season_config.json'
 SEASONS_DIR = 'seasons'
 
+# Held by the one process that runs the initial fetch and the daily scheduler
+SCHEDULER_LOCK_FILE = os.path.join(tempfile.gettempdir(), 'nba_scheduler.lock')
+# The open lock file while this process holds it, else None
+_scheduler_lock_file = None
+
+# Responses smaller than this aren't worth compressing
+GZIP_MIN_SIZE = 1024  # bytes
+GZIP_MIMETYPES = ('application/json', 'text/html')
+
+# How long browsers/CDNs may reuse the standings page and API without revalidating
+CACHE_MAX_AGE = 60 * 60  # seconds; the data changes at most a few times a day
+
+# Parsed contents of CACHE_FILE as (mtime, data), so requests only re-read
+# the file when it has changed. Replaced as a whole so readers never see a
+# mismatched pair; the lock keeps concurrent requests from all re-parsing.
+_cached = (None, None)
+_cache_lock = threading.Lock()
+
+# Refreshes triggered by requests run here, so no request waits on the NBA API
+CACHE_STALE_AFTER = 12 * 60 * 60  # seconds
+CACHE_MISS_RETRY_AFTER = 30  # seconds; Retry-After while the first fetch runs
+REFRESH_RETRY_INTERVAL = 15 * 60  # seconds; don't hammer the API if updates keep failing
+_refresh_executor = ThreadPoolExecutor(max_workers=1)
+_refresh_future = None
+_last_refresh_attempt = 0
+_refresh_lock = threading.Lock()
+
+# Serializes sandbox recalculations, which temporarily swap TEAM_ASSIGNMENTS
+_assignments_lock = threading.Lock()
+
+# (data, html, gzipped html, etag) for the last rendered index page; the page
+# only depends on the cache data, so it's rendered once per loaded cache
+_index_page = (None, None, None, None)
+
+# (data, json body, gzipped json body, etag) for the last serialized /api/standings payload
+_standings_json = (None, None, None, None)
+
 def update_nba_data():
     """
     Fetch latest NBA data and cache it
@@ -34,13 +99,32 @@ def update_nba_data():
         return True
     
     try:
-        team_stats = fetch_team_stats()
+        # Extend the cached game log rather than re-downloading the whole season
+        cached_records, cached_dates = None, None
+        if os.path.exists(CACHE_FILE):
+            try:
+                with open(CACHE_FILE, 'rb') as f:
+                    cached = orjson.loads(f.read())
+                cached_records, cached_dates = cached.get('team_records'), cached.get('dates')
+            except Exception as e:
+                print(f"Could not read cached history: {e}")
+        
+        # Current standings and the historical game log are independent
+        # requests, so fetch them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            stats_future = executor.submit(fetch_team_stats)
+            history_future = executor.submit(fetch_historical_standings, cached_records, cached_dates)
+            team_stats = stats_future.result()
+            team_records, dates = history_future.result()
+        
         if team_stats:
-            friend_totals = calculate_friend_totals(team_stats)
-            
-            # Also fetch historical data for the graph
-            team_records, dates = fetch_historical_standings()
-            friend_history = calculate_friend_historical_standings(team_records, dates) if team_records else None
+            # Hold the sandbox lock so a concurrent /api/recalculate can't swap in
+            # its custom rosters while the real standings are being calculated
+            with _assignments_lock:
+                friend_totals = calculate_friend_totals(team_stats)
+                
+                # Historical data for the graph
+                friend_history = calculate_friend_historical_standings(team_records, dates) if team_records else None
             
             # Prepare data for caching (include team_records for sandbox mode)
             cache_data = {
@@ -53,8 +137,12 @@ def update_nba_data():
             }
             
             # Save to cache file
-            with open(CACHE_FILE, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+            write_json_atomic(CACHE_FILE, cache_data)
+            
+            # Serve the fresh data straight from memory rather than re-reading it
+            global _cached
+            with _cache_lock:
+                _cached = (os.stat(CACHE_FILE).st_mtime, cache_data)
             
             print(f"[{datetime.now()}] NBA data updated successfully!")
             return True
@@ -66,57 +154,76 @@ def update_nba_data():
         return False
 
 
+def refresh_in_background():
+    """
+    Start update_nba_data() in the background, unless a refresh is already
+    running or one was attempted recently. Only the process holding the
+    scheduler lock writes the cache; other workers pick up its writes.
+    """
+    global _refresh_future, _last_refresh_attempt
+    if _scheduler_lock_file is None:
+        return
+    with _refresh_lock:
+        if _refresh_future is not None and not _refresh_future.done():
+            return
+        if time.time() - _last_refresh_attempt < REFRESH_RETRY_INTERVAL:
+            return
+        _last_refresh_attempt = time.time()
+        _refresh_future = _refresh_executor.submit(update_nba_data)
+
+
 def load_cached_data():
     """
     Load NBA data from cache file
+    The parsed data is kept in memory and only re-read when the file's mtime changes.
+    Stale data is still served while a refresh runs in the background; with no
+    cache at all this returns None rather than blocking on a fetch.
     """
+    global _cached
     if os.path.exists(CACHE_FILE):
         try:
-            with open(CACHE_FILE, 'r') as f:
-                data = json.load(f)
-            # Populate the season schedule module variable for H2H calculations
-            if data.get('full_season_schedule'):
-                load_season_schedule(cached_schedule=data['full_season_schedule'])
+            mtime = os.stat(CACHE_FILE).st_mtime
+            cached_mtime, data = _cached
+            if mtime != cached_mtime:
+                with _cache_lock:
+                    cached_mtime, data = _cached
+                    if mtime != cached_mtime:
+                        with open(CACHE_FILE, 'rb') as f:
+                            data = orjson.loads(f.read())
+                        # Populate the season schedule module variable for H2H calculations
+                        if data.get('full_season_schedule'):
+                            load_season_schedule(cached_schedule=data['full_season_schedule'])
+                        _cached = (mtime, data)
+            
+            if time.time() - mtime > CACHE_STALE_AFTER:
+                refresh_in_background()
             return data
         except Exception as e:
             print(f"Error loading cache: {e}")
+            # Keep serving the last good data rather than failing the request
+            if _cached[1] is not None:
+                return _cached[1]
     
-    # If no cache exists, fetch fresh data
-    print("No cache found, fetching fresh data...")
-    update_nba_data()
-    
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, 'r') as f:
-            return json.load(f)
-    
+    # If no cache exists, fetch fresh data without holding up this request
+    print("No cache found, fetching fresh data in the background...")
+    refresh_in_background()
     return None
 
 
-@app.route('/')
-def index():
+def build_team_breakdown(sorted_friends, team_stats):
     """
-    Main page displaying NBA standings
+    Build each friend's per-team records (sorted by wins) for the breakdown table
     """
-    data = load_cached_data()
-    
-    if not data:
-        return "Error loading NBA data. Please try again later.", 500
+    # Resolve drafted team names to team_stats keys once, then one dict lookup per team
+    team_index = index_team_data(team_stats)
     
-    # Sort friends by win percentage (descending)
-    sorted_friends = sorted(
-        data['friend_totals'].items(), 
-        key=lambda x: x[1]['win_pct'], 
-        reverse=True
-    )
-    
-    # Prepare team breakdown data
     team_breakdown = {}
     for friend, stats in sorted_friends:
         team_records = []
-        for team in stats['teams']:
-            # Use exact team name matching from TEAM_ASSIGNMENTS
-            if team in data['team_stats']:
-                team_info = data['team_stats'][team]
+        for team in stats.get('teams', []):
+            api_team = team_index.get(team)
+            if api_team is not None:
+                team_info = team_stats[api_team]
                 games_played = team_info.get('games_played', 1)
                 pts_scored = team_info.get('total_pts_scored', 0)
                 pts_allowed = team_info.get('total_pts_allowed', 0)
@@ -134,27 +241,141 @@ def index():
         team_records.sort(key=lambda x: x['wins'], reverse=True)
         team_breakdown[friend] = team_records
     
-    return render_template(
-        'index.html',
-        sorted_friends=sorted_friends,
-        team_breakdown=team_breakdown,
-        last_updated=data['last_updated'],
-        friend_history=data.get('friend_history'),
-        todays_games=data.get('todays_games', []),
-        yesterdays_games=data.get('yesterdays_games', [])
-    )
+    return team_breakdown
+
+
+def render_index_page(data):
+    """
+    Return the rendered index page for the cached data as (html, gzipped html, etag),
+    rendering it only when the cache data has changed
+    """
+    global _index_page
+    page_data, html, html_gz, etag = _index_page
+    if page_data is not data:
+        # Sort friends by win percentage (descending)
+        sorted_friends = sorted(
+            data['friend_totals'].items(), 
+            key=lambda x: x[1]['win_pct'], 
+            reverse=True
+        )
+        
+        html = render_template(
+            'index.html',
+            sorted_friends=sorted_friends,
+            team_breakdown=build_team_breakdown(sorted_friends, data['team_stats']),
+            last_updated=data['last_updated'],
+            friend_history=data.get('friend_history'),
+            todays_games=data.get('todays_games', []),
+            yesterdays_games=data.get('yesterdays_games', [])
+        )
+        html_gz = gzip.compress(html.encode('utf-8'), compresslevel=6)
+        etag = hashlib.blake2b(html.encode('utf-8'), digest_size=8).hexdigest()
+        _index_page = (data, html, html_gz, etag)
+    return html, html_gz, etag
+
+
+def serialize_standings(data):
+    """
+    Return the /api/standings body for the cached data as
+    (json bytes, gzipped json bytes, etag), serializing it only when the
+    cache data has changed
+    """
+    global _standings_json
+    json_data, body, body_gz, etag = _standings_json
+    if json_data is not data:
+        # Same encoding jsonify() would produce
+        body = (app.json.dumps(data) + '\n').encode('utf-8')
+        body_gz = gzip.compress(body, compresslevel=6)
+        etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        _standings_json = (data, body, body_gz, etag)
+    return body, body_gz, etag
+
+
+def make_cacheable(response, data, etag):
+    """
+    Mark a response built from the cached data as publicly cacheable, with
+    validators, and answer a matching conditional request with a 304
+    """
+    # Gzipped and plain bodies differ byte for byte, so each needs its own strong ETag
+    if response.headers.get('Content-Encoding') == 'gzip':
+        etag += '-gzip'
+    response.set_etag(etag)
+    # The cache file's mtime is a real timestamp; last_updated is naive local time
+    mtime, cached_data = _cached
+    if cached_data is data:
+        response.last_modified = mtime
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    # Shared caches must keep gzipped and plain copies apart
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
+
+
+@app.after_request
+def gzip_response(response):
+    """
+    Gzip large JSON/HTML responses for clients that accept it
+    (the standings payload carries every team's full game history)
+    """
+    if (response.status_code != 200 or response.direct_passthrough
+            or response.mimetype not in GZIP_MIMETYPES
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return response
+    
+    body = response.get_data()
+    if len(body) < GZIP_MIN_SIZE:
+        return response
+    
+    response.set_data(gzip.compress(body, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+@app.route('/')
+def index():
+    """
+    Main page displaying NBA standings
+    """
+    data = load_cached_data()
+    
+    if not data:
+        # No cache yet; it's being fetched in the background
+        return "NBA data is loading. Please try again shortly.", 503, {'Retry-After': str(CACHE_MISS_RETRY_AFTER)}
+    
+    html, html_gz, etag = render_index_page(data)
+    
+    # Serve the precompressed page rather than gzipping it per request
+    if 'gzip' in request.headers.get('Accept-Encoding', '').lower():
+        response = Response(html_gz, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(html, mimetype='text/html')
+    return make_cacheable(response, data, etag)
 
 
 @app.route('/api/standings')
 def api_standings():
     """
     API endpoint to get current standings as JSON
+    Pass ?pretty=1 for indented output (the cache file itself is compact)
     """
     data = load_cached_data()
+    if data and request.args.get('pretty'):
+        return Response(app.json.dumps(data, indent=2), mimetype='application/json')
     if data:
-        return jsonify(data)
+        body, body_gz, etag = serialize_standings(data)
+        # Pick the encoding here rather than in gzip_response, so the ETag
+        # matches the body actually sent
+        if 'gzip' in request.headers.get('Accept-Encoding', '').lower():
+            response = Response(body_gz, mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(body, mimetype='application/json')
+        return make_cacheable(response, data, etag)
     else:
-        return jsonify({'error': 'Failed to load data'}), 500
+        return jsonify({'error': 'Data is loading, try again shortly'}), 503, {'Retry-After': str(CACHE_MISS_RETRY_AFTER)}
 
 
 @app.route('/api/update')
@@ -189,30 +410,30 @@ def api_recalculate():
         # Recalculate with custom assignments
         from nba_tracker import calculate_friend_totals, calculate_friend_historical_standings
         
-        # Temporarily override team assignments
-        original_assignments = TEAM_ASSIGNMENTS.copy()
-        TEAM_ASSIGNMENTS.clear()
-        TEAM_ASSIGNMENTS.update(custom_assignments)
-        
-        # Recalculate friend totals with custom assignments
-        custom_friend_totals = calculate_friend_totals(data['team_stats'])
-        
-        # Recalculate historical standings if historical data exists
-        custom_friend_history = None
-        if data.get('friend_history') and data.get('team_records') and data.get('dates'):
-            # Use cached team records - no need to fetch from API
+        # Temporarily override team assignments. They are module globals shared by
+        # every request, so hold the lock for the override and always restore them.
+        with _assignments_lock:
+            original_assignments = TEAM_ASSIGNMENTS.copy()
+            set_team_assignments(custom_assignments)
             try:
-                custom_friend_history = calculate_friend_historical_standings(
-                    data['team_records'], 
-                    data['dates']
-                )
-            except Exception as e:
-                print(f"Error calculating historical data: {e}")
+                # Recalculate friend totals with custom assignments
+                custom_friend_totals = calculate_friend_totals(data['team_stats'])
+                
+                # Recalculate historical standings if historical data exists
                 custom_friend_history = None
-        
-        # Restore original assignments
-        TEAM_ASSIGNMENTS.clear()
-        TEAM_ASSIGNMENTS.update(original_assignments)
+                if data.get('friend_history') and data.get('team_records') and data.get('dates'):
+                    # Use cached team records - no need to fetch from API
+                    try:
+                        custom_friend_history = calculate_friend_historical_standings(
+                            data['team_records'], 
+                            data['dates']
+                        )
+                    except Exception as e:
+                        print(f"Error calculating historical data: {e}")
+                        custom_friend_history = None
+            finally:
+                # Restore original assignments
+                set_team_assignments(original_assignments)
         
         # Sort friends by win percentage (descending)
         sorted_friends = sorted(
@@ -221,30 +442,7 @@ def api_recalculate():
             reverse=True
         )
         
-        # Prepare team breakdown data
-        team_breakdown = {}
-        for friend, stats in sorted_friends:
-            team_records = []
-            for team in stats['teams']:
-                # Use exact team name matching from TEAM_ASSIGNMENTS
-                if team in data['team_stats']:
-                    team_info = data['team_stats'][team]
-                    games_played = team_info.get('games_played', 1)
-                    pts_scored = team_info.get('total_pts_scored', 0)
-                    pts_allowed = team_info.get('total_pts_allowed', 0)
-                    pt_diff_per_game = (pts_scored - pts_allowed) / games_played if games_played > 0 else 0
-                    
-                    team_records.append({
-                        'name': team,
-                        'wins': team_info.get('wins', 0),
-                        'losses': team_info.get('losses', 0),
-                        'win_pct': team_info.get('win_pct', 0),
-                        'pt_diff': pt_diff_per_game
-                    })
-            
-            # Sort by wins
-            team_records.sort(key=lambda x: x['wins'], reverse=True)
-            team_breakdown[friend] = team_records
+        team_breakdown = build_team_breakdown(sorted_friends, data['team_stats'])
         
         return jsonify({
             'status': 'success',
@@ -281,8 +479,8 @@ def api_teams():
 def load_season_config():
     """Load the season configuration file."""
     if os.path.exists(SEASON_CONFIG_FILE):
-        with open(SEASON_CONFIG_FILE, 'r') as f:
-            return json.load(f)
+        with open(SEASON_CONFIG_FILE, 'rb') as f:
+            return orjson.loads(f.read())
     return {'current_season': None, 'seasons': {}}
 
 
@@ -290,8 +488,8 @@ def load_season_data(season_id):
     """Load archived data for a specific season."""
     data_file = os.path.join(SEASONS_DIR, season_id, 'data.json')
     if os.path.exists(data_file):
-        with open(data_file, 'r') as f:
-            return json.load(f)
+        with open(data_file, 'rb') as f:
+            return orjson.loads(f.read())
     return None
 
 
@@ -302,8 +500,8 @@ def get_all_seasons():
         for season_dir in sorted(os.listdir(SEASONS_DIR), reverse=True):
             data_file = os.path.join(SEASONS_DIR, season_dir, 'data.json')
             if os.path.exists(data_file):
-                with open(data_file, 'r') as f:
-                    data = json.load(f)
+                with open(data_file, 'rb') as f:
+                    data = orjson.loads(f.read())
                 seasons.append({
                     'id': season_dir,
                     'display_name': data.get('season_display', season_dir),
@@ -350,26 +548,7 @@ def season_detail(season_id):
         reverse=True
     )
     
-    # Prepare team breakdown
-    team_breakdown = {}
-    for friend, stats in sorted_friends:
-        team_records = []
-        for team in stats.get('teams', []):
-            if team in data.get('team_stats', {}):
-                team_info = data['team_stats'][team]
-                games_played = team_info.get('games_played', 1)
-                pts_scored = team_info.get('total_pts_scored', 0)
-                pts_allowed = team_info.get('total_pts_allowed', 0)
-                pt_diff_per_game = (pts_scored - pts_allowed) / games_played if games_played > 0 else 0
-                team_records.append({
-                    'name': team,
-                    'wins': team_info.get('wins', 0),
-                    'losses': team_info.get('losses', 0),
-                    'win_pct': team_info.get('win_pct', 0),
-                    'pt_diff': pt_diff_per_game
-                })
-        team_records.sort(key=lambda x: x['wins'], reverse=True)
-        team_breakdown[friend] = team_records
+    team_breakdown = build_team_breakdown(sorted_friends, data.get('team_stats', {}))
     
     return render_template(
         'season_detail.html',
@@ -461,6 +640,25 @@ def all_time():
     )
 
 
+def acquire_scheduler_lock():
+    """
+    Try to become the single process that updates data and runs the scheduler
+    Returns the open lock file (kept in _scheduler_lock_file so the lock stays
+    held), or None if another process already holds it
+    """
+    global _scheduler_lock_file
+    if _scheduler_lock_file is not None:
+        return _scheduler_lock_file
+    lock_file = open(SCHEDULER_LOCK_FILE, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    _scheduler_lock_file = lock_file
+    return lock_file
+
+
 def start_scheduler():
     """
     Start the background scheduler for automatic updates
@@ -486,12 +684,17 @@ def start_scheduler():
 
 
 if __name__ == '__main__':
-    # Update data on startup
-    print("Fetching initial NBA data...")
-    update_nba_data()
-    
-    # Start the scheduler
-    scheduler = start_scheduler()
+    # Only fetch and schedule updates if no other server process already does
+    scheduler = None
+    if acquire_scheduler_lock():
+        # Update data on startup
+        print("Fetching initial NBA data...")
+        update_nba_data()
+        
+        # Start the scheduler
+        scheduler = start_scheduler()
+    else:
+        print("Another process is running the update scheduler")
     
     # Run the Flask app
     print("\nStarting web server...")
@@ -506,9 +709,15 @@ if __name__ == '__main__':
     try:
         app.run(host='0.0.0.0', port=port, debug=False)
     except (KeyboardInterrupt, SystemExit):
-        scheduler.shutdown()
+        if scheduler:
+            scheduler.shutdown()
         print("\nServer stopped.")
 else:
-    # When running with Gunicorn, initialize on module load
-    update_nba_data()
-    scheduler = start_scheduler()
+    # When running with Gunicorn, initialize on module load. Every worker imports
+    # this module, so only the one holding the lock fetches and schedules updates;
+    # the rest serve the shared cache file, which is reloaded when it changes
+    if acquire_scheduler_lock():
+        update_nba_data()
+        scheduler = start_scheduler()
+    else:
+        print("Another worker is running the update scheduler")